@@ -4,6 +4,7 @@ SKU 분배 최적화 메인 실행 파일
 
 import sys
 import os
+import matplotlib
 
 # 모듈 import를 위한 경로 추가
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -17,7 +18,7 @@ from config import EXPERIMENT_SCENARIOS, DEFAULT_TARGET_STYLE, DEFAULT_SCENARIO
 
 
 def run_optimization(target_style=DEFAULT_TARGET_STYLE, scenario=DEFAULT_SCENARIO, 
-                    show_detailed_output=False, create_visualizations=True):
+                    show_detailed_output=False, create_visualizations=True, visualizer=None):
     """
     SKU 분배 최적화 실행
     
@@ -26,6 +27,7 @@ def run_optimization(target_style=DEFAULT_TARGET_STYLE, scenario=DEFAULT_SCENARI
         scenario: 실험 시나리오 이름
         show_detailed_output: 상세 출력 여부
         create_visualizations: 시각화 생성 여부
+        visualizer: 재사용할 ResultVisualizer (None이면 이번 실행용으로 만들고 끝나면 닫음)
     """
     
     print("🚀 SKU 분배 최적화 시작")
@@ -113,7 +115,10 @@ def run_optimization(target_style=DEFAULT_TARGET_STYLE, scenario=DEFAULT_SCENARI
         # 9. 시각화 (옵션)
         if create_visualizations:
             print("\n📈 8단계: 시각화 생성")
-            visualizer = ResultVisualizer()
+            # 배치 실행에서 넘겨준 visualizer가 있으면 그 Figure를 재사용
+            owns_visualizer = visualizer is None
+            if owns_visualizer:
+                visualizer = ResultVisualizer(headless=True)  # PNG 저장만 하므로 화면 표시 생략
             
             try:
                 # PNG 저장 경로 생성
@@ -143,6 +148,9 @@ def run_optimization(target_style=DEFAULT_TARGET_STYLE, scenario=DEFAULT_SCENARI
             except Exception as e:
                 print(f"⚠️ 시각화 생성 중 오류: {str(e)}")
                 print("   (시각화 오류는 전체 프로세스에 영향을 주지 않습니다)")
+            finally:
+                if owns_visualizer:
+                    visualizer.close()  # 재사용하던 Figure 메모리 정리
         
         # 10. 최종 요약 출력
         print("\n" + "="*50)
@@ -197,24 +205,32 @@ def run_batch_experiments(target_styles=None, scenarios=None, create_visualizati
     
     results = []
     
-    for target_style in target_styles:
-        for scenario in scenarios:
-            print(f"\n{'='*60}")
-            print(f"실험: {target_style} - {scenario}")
-            print(f"{'='*60}")
-            
-            result = run_optimization(
-                target_style=target_style,
-                scenario=scenario,
-                show_detailed_output=False,
-                create_visualizations=create_visualizations  # 파라미터로 제어
-            )
-            
-            if result:
-                results.append(result)
-                print(f"✅ 완료: {target_style} - {scenario}")
-            else:
-                print(f"❌ 실패: {target_style} - {scenario}")
+    # 실험 간 Figure/Axes를 재사용하도록 visualizer는 배치 전체에서 하나만 사용
+    visualizer = ResultVisualizer(headless=True) if create_visualizations else None
+    
+    try:
+        for target_style in target_styles:
+            for scenario in scenarios:
+                print(f"\n{'='*60}")
+                print(f"실험: {target_style} - {scenario}")
+                print(f"{'='*60}")
+                
+                result = run_optimization(
+                    target_style=target_style,
+                    scenario=scenario,
+                    show_detailed_output=False,
+                    create_visualizations=create_visualizations,  # 파라미터로 제어
+                    visualizer=visualizer
+                )
+                
+                if result:
+                    results.append(result)
+                    print(f"✅ 완료: {target_style} - {scenario}")
+                else:
+                    print(f"❌ 실패: {target_style} - {scenario}")
+    finally:
+        if visualizer is not None:
+            visualizer.close()
     
     print(f"\n🎉 배치 실험 완료!")
     print(f"   성공한 실험: {len(results)}개")
@@ -249,6 +265,10 @@ def list_saved_experiments():
 if __name__ == "__main__":
     """메인 실행부"""
     
+    # 스크립트 실행은 PNG 저장만 하므로 GUI 없는 Agg 백엔드 사용 (MPLBACKEND 지정 시 그 값을 따름)
+    if 'MPLBACKEND' not in os.environ:
+        matplotlib.use('Agg')
+    
     print("🔧 SKU 분배 최적화 시스템")
     print("="*50)
     
@@ -2,7 +2,11 @@
 시각화 모듈
 """
 
+from itertools import groupby
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.patches import Rectangle
 import numpy as np
 import seaborn as sns
 
@@ -10,13 +14,72 @@ import seaborn as sns
 class ResultVisualizer:
     """배분 결과 시각화를 담당하는 클래스"""
     
-    def __init__(self):
+    def __init__(self, headless=False, dpi=150):
+        """
+        Args:
+            headless: True면 plt.show() 없이 저장만 수행 (PNG 저장 전용 배치 실행용, 백엔드는 main.py 또는 MPLBACKEND로 지정)
+            dpi: PNG 저장 해상도 (고품질 출력이 필요하면 300; SVG 저장 시에는 무시)
+        """
+        self.headless = headless
+        self.dpi = dpi
         # 한글 폰트 설정
         plt.rcParams['font.family'] = 'DejaVu Sans'
         plt.rcParams['axes.unicode_minus'] = False
-        
-    def create_comprehensive_visualization(self, analysis_results, target_style, save_path=None):
-        """종합 시각화 생성"""
+        # 히트맵 컬러맵은 한 번만 조회해서 재사용
+        self._heatmap_cmap = plt.get_cmap('Blues')
+        self._performance_cmap = plt.get_cmap('YlOrRd')
+        # 차트 종류별로 Figure/Axes를 재사용 (배치 실행 시 매번 Axes를 새로 만드는 비용 절감)
+        self._fig_pool = {}
+    
+    def _save_figure(self, fig, save_path, **kwargs):
+        """설정된 DPI로 Figure 저장 (벡터 포맷인 SVG는 DPI 지정 생략)"""
+        if not str(save_path).lower().endswith('.svg'):
+            kwargs['dpi'] = self.dpi
+        fig.savefig(save_path, **kwargs)
+    
+    def _get_pooled_figure(self, key, nrows, ncols, figsize):
+        """차트 종류별 Figure/Axes 반환 (이미 있으면 내용만 지우고 재사용)"""
+        pooled = self._fig_pool.get(key)
+        if pooled is None or not plt.fignum_exists(pooled['fig'].number):
+            fig, axes = plt.subplots(nrows, ncols, figsize=figsize)
+            pooled = {'fig': fig, 'axes': axes, 'colorbars': []}
+            self._fig_pool[key] = pooled
+        else:
+            for cbar in pooled['colorbars']:
+                cbar.remove()
+            pooled['colorbars'].clear()
+            for ax in np.ravel(pooled['axes']):
+                ax.clear()
+            # 크기와 서브플롯 배치를 새 Figure와 같은 초기 상태로 되돌림 (이전 tight_layout/컬러바 영향 제거)
+            pooled['fig'].set_size_inches(figsize)
+            pooled['fig'].subplots_adjust(**{
+                key: plt.rcParams[f'figure.subplot.{key}']
+                for key in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')
+            })
+        
+        plt.figure(pooled['fig'].number)
+        return pooled['fig'], pooled['axes']
+    
+    def _add_pooled_colorbar(self, key, mappable, **kwargs):
+        """재사용 Figure에 컬러바 추가 (다음 호출 시 제거할 수 있도록 기록)"""
+        cbar = plt.colorbar(mappable, **kwargs)
+        self._fig_pool[key]['colorbars'].append(cbar)
+        return cbar
+    
+    def _select_subplot(self, subplot_num):
+        """종합 시각화의 subplot_num번째 Axes를 현재 Axes로 지정"""
+        ax = np.ravel(self._fig_pool['comprehensive']['axes'])[subplot_num - 1]
+        plt.sca(ax)
+        return ax
+    
+    def close(self):
+        """재사용 중인 Figure들을 모두 닫아 메모리 해제"""
+        for pooled in self._fig_pool.values():
+            plt.close(pooled['fig'])
+        self._fig_pool.clear()
+        
+    def create_comprehensive_visualization(self, analysis_results, target_style, save_path=None, show=True):
+        """종합 시각화 생성 (show=False면 저장 경로가 없어도 화면 표시 생략)"""
         print("📈 배분 결과 시각화 생성 중...")
         
         style_coverage = analysis_results['style_coverage']
@@ -24,7 +87,7 @@ class ResultVisualizer:
         performance_analysis = analysis_results['performance_analysis']
         
         # 전체 그래프 설정
-        fig = plt.figure(figsize=(20, 15))
+        fig, _ = self._get_pooled_figure('comprehensive', 2, 3, figsize=(20, 15))
         fig.suptitle(f'SKU Distribution Analysis - Style: {target_style}', fontsize=16, fontweight='bold')
         
         # 1. 색상/사이즈 커버리지 비교
@@ -49,21 +112,19 @@ class ResultVisualizer:
         
         # PNG 파일로 저장
         if save_path:
-            # DPI 높게 설정하여 고품질 저장
-            plt.savefig(save_path, dpi=300, bbox_inches='tight', 
-                       facecolor='white', edgecolor='none')
+            # 설정된 DPI로 저장 (tight_layout 적용 후라 bbox_inches='tight' 재렌더링 불필요)
+            self._save_figure(fig, save_path, facecolor='white', edgecolor='none')
             print(f"📊 시각화 결과 저장: {save_path}")
-        else:
+        elif show and not self.headless:
             plt.show()
         
-        plt.close()  # 메모리 정리
         print("✅ 시각화 완료!")
         
         return fig
     
     def _plot_coverage_comparison(self, fig, style_coverage, subplot_num):
         """색상/사이즈 커버리지 비교 막대 그래프"""
-        plt.subplot(2, 3, subplot_num)
+        ax = self._select_subplot(subplot_num)
         
         color_cov = style_coverage['color_coverage']
         size_cov = style_coverage['size_coverage']
@@ -75,66 +136,88 @@ class ResultVisualizer:
         x = np.arange(len(categories))
         width = 0.35
         
-        bars1 = plt.bar(x - width/2, color_values, width, label='Color Coverage', alpha=0.8)
-        bars2 = plt.bar(x + width/2, size_values, width, label='Size Coverage', alpha=0.8)
+        bars1 = ax.bar(x - width/2, color_values, width, label='Color Coverage', alpha=0.8)
+        bars2 = ax.bar(x + width/2, size_values, width, label='Size Coverage', alpha=0.8)
         
-        plt.title('Color vs Size Coverage Comparison')
-        plt.xlabel('Statistics')
-        plt.ylabel('Coverage Ratio')
-        plt.xticks(x, categories)
-        plt.legend()
-        plt.grid(axis='y', alpha=0.3)
+        ax.set_title('Color vs Size Coverage Comparison')
+        ax.set_xlabel('Statistics')
+        ax.set_ylabel('Coverage Ratio')
+        ax.set_xticks(x, labels=categories)
+        ax.legend()
+        ax.grid(axis='y', alpha=0.3)
         
         # 값 표시
         for i, (c_val, s_val) in enumerate(zip(color_values, size_values)):
-            plt.text(i - width/2, c_val + 0.01, f'{c_val:.2f}', ha='center', va='bottom', fontsize=8)
-            plt.text(i + width/2, s_val + 0.01, f'{s_val:.2f}', ha='center', va='bottom', fontsize=8)
+            ax.text(i - width/2, c_val + 0.01, f'{c_val:.2f}', ha='center', va='bottom', fontsize=8)
+            ax.text(i + width/2, s_val + 0.01, f'{s_val:.2f}', ha='center', va='bottom', fontsize=8)
     
     def _plot_allocation_distribution(self, fig, allocation_ratio, subplot_num):
         """매장별 배분 적정성 분포 히스토그램"""
-        plt.subplot(2, 3, subplot_num)
-        
-        ratios = [data['ratio'] for data in allocation_ratio.values()]
-        
-        plt.hist(ratios, bins=20, color='skyblue', alpha=0.7, edgecolor='black')
-        plt.title('Store Allocation Ratio Distribution')
-        plt.xlabel('Allocation Ratio (Allocated/QTY_SUM)')
-        plt.ylabel('Number of Stores')
-        plt.grid(axis='y', alpha=0.3)
+        ax = self._select_subplot(subplot_num)
+        
+        # 중간 파이썬 리스트 없이 바로 float 배열로 변환
+        ratios = np.fromiter((data['ratio'] for data in allocation_ratio.values()),
+                             dtype=np.float64, count=len(allocation_ratio))
+        
+        # 구간별 개수를 미리 계산한 뒤 막대 한 번으로 그림 (plt.hist 내부 패치 생성 비용 절감)
+        counts, edges = np.histogram(ratios, bins=20)
+        centers = 0.5 * (edges[:-1] + edges[1:])
+        ax.bar(centers, counts, width=np.diff(edges), color='skyblue', alpha=0.7, edgecolor='black')
+        ax.set_title('Store Allocation Ratio Distribution')
+        ax.set_xlabel('Allocation Ratio (Allocated/QTY_SUM)')
+        ax.set_ylabel('Number of Stores')
+        ax.grid(axis='y', alpha=0.3)
         
         # 평균선 표시
         mean_ratio = np.mean(ratios)
-        plt.axvline(mean_ratio, color='red', linestyle='--', linewidth=2, 
-                   label=f'Mean: {mean_ratio:.4f}')
-        plt.legend()
+        ax.axvline(mean_ratio, color='red', linestyle='--', linewidth=2, 
+                  label=f'Mean: {mean_ratio:.4f}')
+        ax.legend()
     
     def _plot_store_size_vs_allocation(self, fig, allocation_ratio, subplot_num):
         """매장 규모 vs 할당량 산점도"""
-        plt.subplot(2, 3, subplot_num)
+        ax = self._select_subplot(subplot_num)
         
-        qty_sums = [data['qty_sum'] for data in allocation_ratio.values()]
-        allocated_amounts = [data['allocated'] for data in allocation_ratio.values()]
+        n_stores = len(allocation_ratio)
+        qty_sums = np.fromiter((data['qty_sum'] for data in allocation_ratio.values()),
+                               dtype=np.float64, count=n_stores)
+        allocated_amounts = np.fromiter((data['allocated'] for data in allocation_ratio.values()),
+                                        dtype=np.float64, count=n_stores)
         
-        plt.scatter(qty_sums, allocated_amounts, alpha=0.6, s=50)
-        plt.title('Store Size vs Allocated Amount')
-        plt.xlabel('QTY_SUM (Store Sales Volume)')
-        plt.ylabel('Allocated Amount')
-        plt.grid(True, alpha=0.3)
+        ax.scatter(qty_sums, allocated_amounts, alpha=0.6, s=50)
+        ax.set_title('Store Size vs Allocated Amount')
+        ax.set_xlabel('QTY_SUM (Store Sales Volume)')
+        ax.set_ylabel('Allocated Amount')
+        ax.grid(True, alpha=0.3)
         
         # 추세선 추가
-        z = np.polyfit(qty_sums, allocated_amounts, 1)
-        p = np.poly1d(z)
-        plt.plot(qty_sums, p(qty_sums), "r--", alpha=0.8, linewidth=2)
-        
-        # 상관계수 표시
-        correlation = np.corrcoef(qty_sums, allocated_amounts)[0, 1]
-        plt.text(0.05, 0.95, f'Correlation: {correlation:.3f}', 
-                transform=plt.gca().transAxes, 
-                bbox=dict(boxstyle="round,pad=0.3", facecolor="yellow", alpha=0.7))
+        slope, intercept = self._fit_line(qty_sums, allocated_amounts)
+        ax.plot(qty_sums, slope * qty_sums + intercept, "r--", alpha=0.8, linewidth=2)
+        
+        # 상관계수 표시 (2x2 상관행렬 대신 피어슨 r 스칼라만 직접 계산)
+        dx = qty_sums - qty_sums.mean()
+        dy = allocated_amounts - allocated_amounts.mean()
+        denom = np.sqrt((dx * dx).sum() * (dy * dy).sum())
+        correlation = (dx * dy).sum() / denom if denom > 0 else np.nan
+        ax.text(0.05, 0.95, f'Correlation: {correlation:.3f}', 
+               transform=ax.transAxes, 
+               bbox=dict(boxstyle="round,pad=0.3", facecolor="yellow", alpha=0.7))
+    
+    @staticmethod
+    def _fit_line(x, y):
+        """1차 추세선의 (기울기, 절편)을 최소제곱 닫힌 해로 계산 (np.polyfit의 SVD 호출 대체)"""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        x_mean = x.mean()
+        y_mean = y.mean()
+        dx = x - x_mean
+        denom = (dx * dx).sum()
+        slope = (dx * (y - y_mean)).sum() / denom if denom > 0 else 0.0
+        return slope, y_mean - slope * x_mean
     
     def _plot_performance_heatmap(self, fig, performance_analysis, subplot_num):
         """성과 분석 히트맵 (상위 매장)"""
-        plt.subplot(2, 3, subplot_num)
+        ax = self._select_subplot(subplot_num)
         
         top_performers = performance_analysis['top_performers'][:15]  # 상위 15개 매장
         
@@ -142,53 +225,51 @@ class ResultVisualizer:
         store_ids = [str(p['store_id']) for p in top_performers]
         metrics = ['Color\nCoverage', 'Size\nCoverage', 'Allocation\nRatio']
         
-        heatmap_data = []
-        for perf in top_performers:
-            row = [
-                perf['color_coverage'],
-                perf['size_coverage'], 
-                min(perf['allocation_ratio'], 1.0)  # 1.0으로 캡핑
-            ]
-            heatmap_data.append(row)
-        
-        heatmap_data = np.array(heatmap_data).T
+        # (지표 × 매장) 배열을 미리 할당하고 지표별로 한 행씩 채움 (0~1 범위라 float32로 충분, 전치 불필요)
+        heatmap_data = np.empty((3, len(top_performers)), dtype=np.float32)
+        heatmap_data[0] = [p['color_coverage'] for p in top_performers]
+        heatmap_data[1] = [p['size_coverage'] for p in top_performers]
+        # 배분 비율은 1.0으로 일괄 캡핑
+        heatmap_data[2] = np.minimum([p['allocation_ratio'] for p in top_performers], 1.0)
         
-        im = plt.imshow(heatmap_data, cmap='YlOrRd', aspect='auto')
-        plt.title('Top Performers Heatmap')
-        plt.xlabel('Store ID')
-        plt.ylabel('Metrics')
-        plt.xticks(range(len(store_ids)), [s[:8] for s in store_ids], rotation=45)
-        plt.yticks(range(len(metrics)), metrics)
+        im = ax.imshow(heatmap_data, cmap=self._performance_cmap, aspect='auto')
+        ax.set_title('Top Performers Heatmap')
+        ax.set_xlabel('Store ID')
+        ax.set_ylabel('Metrics')
+        ax.set_xticks(range(len(store_ids)), labels=[s[:8] for s in store_ids], rotation=45)
+        ax.set_yticks(range(len(metrics)), labels=metrics)
         
         # 컬러바 추가
-        plt.colorbar(im, fraction=0.046, pad=0.04)
+        self._add_pooled_colorbar('comprehensive', im, ax=ax, fraction=0.046, pad=0.04)
     
     def _plot_coverage_vs_allocation(self, fig, analysis_results, subplot_num):
         """커버리지 vs 배분량 산점도"""  
-        plt.subplot(2, 3, subplot_num)
+        ax = self._select_subplot(subplot_num)
         
         performance_data = analysis_results['performance_analysis']['all_performance']
         
         # 총 커버리지 (색상 + 사이즈)
-        total_coverage = [p['color_coverage'] + p['size_coverage'] for p in performance_data]
-        allocated_amounts = [p['total_allocated'] for p in performance_data]
-        
-        plt.scatter(total_coverage, allocated_amounts, alpha=0.6, s=50, color='green')
-        plt.title('Total Coverage vs Allocated Amount')
-        plt.xlabel('Total Coverage (Color + Size)')
-        plt.ylabel('Allocated Amount')
-        plt.grid(True, alpha=0.3)
+        n_stores = len(performance_data)
+        total_coverage = np.fromiter((p['color_coverage'] + p['size_coverage'] for p in performance_data),
+                                     dtype=np.float64, count=n_stores)
+        allocated_amounts = np.fromiter((p['total_allocated'] for p in performance_data),
+                                        dtype=np.float64, count=n_stores)
+        
+        ax.scatter(total_coverage, allocated_amounts, alpha=0.6, s=50, color='green')
+        ax.set_title('Total Coverage vs Allocated Amount')
+        ax.set_xlabel('Total Coverage (Color + Size)')
+        ax.set_ylabel('Allocated Amount')
+        ax.grid(True, alpha=0.3)
         
         # 추세선
         if len(total_coverage) > 1:
-            z = np.polyfit(total_coverage, allocated_amounts, 1)
-            p = np.poly1d(z)
-            plt.plot(total_coverage, p(total_coverage), "r--", alpha=0.8, linewidth=2)
+            slope, intercept = self._fit_line(total_coverage, allocated_amounts)
+            ax.plot(total_coverage, slope * total_coverage + intercept, "r--", alpha=0.8, linewidth=2)
     
     def _plot_statistics_summary(self, fig, analysis_results, subplot_num):
         """통계 요약 텍스트"""
-        plt.subplot(2, 3, subplot_num)
-        plt.axis('off')
+        ax = self._select_subplot(subplot_num)
+        ax.axis('off')
         
         overall_eval = analysis_results['overall_evaluation']
         
@@ -210,17 +291,14 @@ Performance Summary
 • Average Performance: {np.mean([p['performance_score'] for p in analysis_results['performance_analysis']['all_performance']]):.3f}
 """
         
-        plt.text(0.05, 0.95, summary_text, transform=plt.gca().transAxes, 
-                fontsize=10, verticalalignment='top', fontfamily='monospace',
-                bbox=dict(boxstyle="round,pad=0.5", facecolor="lightblue", alpha=0.8))
+        ax.text(0.05, 0.95, summary_text, transform=ax.transAxes, 
+               fontsize=10, verticalalignment='top', fontfamily='monospace',
+               bbox=dict(boxstyle="round,pad=0.5", facecolor="lightblue", alpha=0.8))
     
-    def create_simple_summary_chart(self, analysis_results, save_path=None):
-        """간단한 요약 차트 생성"""
+    def create_simple_summary_chart(self, analysis_results, save_path=None, show=True):
+        """간단한 요약 차트 생성 (show=False면 저장 경로가 없어도 화면 표시 생략)"""
         overall_eval = analysis_results['overall_evaluation']
         
-        # 간단한 막대 차트
-        fig, ax = plt.subplots(1, 1, figsize=(10, 6))
-        
         metrics = ['Color\nCoverage', 'Size\nCoverage', 'Allocation\nEfficiency', 'Allocation\nBalance']
         values = [
             overall_eval['overall_color_coverage'],
@@ -228,40 +306,57 @@ Performance Summary
             overall_eval['overall_allocation_efficiency'],
             overall_eval['allocation_balance']
         ]
-        
-        bars = ax.bar(metrics, values, color=['skyblue', 'lightgreen', 'orange', 'pink'], alpha=0.8)
-        ax.set_title('Overall Performance Metrics', fontsize=14, fontweight='bold')
-        ax.set_ylabel('Score')
-        ax.set_ylim(0, 1.0)
-        ax.grid(axis='y', alpha=0.3)
-        
-        # 값 표시
-        for bar, value in zip(bars, values):
-            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.01, 
-                   f'{value:.3f}', ha='center', va='bottom', fontweight='bold')
-        
-        # 평균선 표시
         avg_score = overall_eval['total_score']
-        ax.axhline(y=avg_score, color='red', linestyle='--', linewidth=2, 
-                  label=f'Average: {avg_score:.3f}')
-        ax.legend()
         
-        plt.tight_layout()
+        pooled = self._fig_pool.get('summary')
+        artists = pooled.get('artists') if pooled is not None else None
+        if artists is not None and plt.fignum_exists(pooled['fig'].number):
+            # 막대 개수가 고정이므로 Axes를 지우지 않고 기존 아티스트의 값만 갱신
+            fig, ax = pooled['fig'], pooled['axes']
+            for bar, label, value in zip(artists['bars'], artists['labels'], values):
+                bar.set_height(value)
+                label.set_y(value + 0.01)
+                label.set_text(f'{value:.3f}')
+            artists['avg_line'].set_ydata([avg_score, avg_score])
+            artists['avg_line'].set_label(f'Average: {avg_score:.3f}')
+            ax.legend()
+        else:
+            # 간단한 막대 차트
+            fig, ax = self._get_pooled_figure('summary', 1, 1, figsize=(10, 6))
+            
+            bars = ax.bar(metrics, values, color=['skyblue', 'lightgreen', 'orange', 'pink'], alpha=0.8)
+            ax.set_title('Overall Performance Metrics', fontsize=14, fontweight='bold')
+            ax.set_ylabel('Score')
+            ax.set_ylim(0, 1.0)
+            ax.grid(axis='y', alpha=0.3)
+            
+            # 값 표시
+            labels = [ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.01, 
+                              f'{value:.3f}', ha='center', va='bottom', fontweight='bold')
+                      for bar, value in zip(bars, values)]
+            
+            # 평균선 표시
+            avg_line = ax.axhline(y=avg_score, color='red', linestyle='--', linewidth=2, 
+                                  label=f'Average: {avg_score:.3f}')
+            ax.legend()
+            
+            plt.tight_layout()
+            self._fig_pool['summary']['artists'] = {
+                'bars': list(bars), 'labels': labels, 'avg_line': avg_line
+            }
         
         # PNG 파일로 저장
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight', 
-                       facecolor='white', edgecolor='none')
+            self._save_figure(fig, save_path, facecolor='white', edgecolor='none')
             print(f"📊 요약 차트 저장: {save_path}")
-        else:
+        elif show and not self.headless:
             plt.show()
         
-        plt.close()  # 메모리 정리
-        
         return fig 
     
     def create_allocation_matrix_heatmap(self, final_allocation, target_stores, SKUs, QSUM, 
-                                       df_sku_filtered, save_path=None, max_stores=30, max_skus=20):
+                                       df_sku_filtered, save_path=None, max_stores=30, max_skus=20,
+                                       return_array=False, show=True):
         """
         배분 결과를 매장 × SKU 매트릭스 히트맵으로 시각화
         
@@ -274,35 +369,67 @@ Performance Summary
             save_path: 저장 경로 (None이면 화면 표시)
             max_stores: 표시할 최대 매장 수
             max_skus: 표시할 최대 SKU 수
+            return_array: True면 렌더링된 RGBA 배열을 결과의 'image' 키로 함께 반환
+            show: False면 저장 경로가 없어도 화면 표시 생략 (PDF 페이지 수집 등)
         """
         print("📊 배분 매트릭스 히트맵 생성 중...")
         
-        # 1. 배분이 있는 매장들만 필터링하고 QTY_SUM 기준으로 정렬
-        allocated_stores = []
-        for store in target_stores:
-            store_total = sum(final_allocation.get((sku, store), 0) for sku in SKUs)
-            if store_total > 0:
-                allocated_stores.append((store, store_total, QSUM[store]))
-        
-        # QTY_SUM 기준 내림차순 정렬
-        allocated_stores.sort(key=lambda x: x[2], reverse=True)
-        selected_stores = [store[0] for store in allocated_stores[:max_stores]]
+        # 배분 결과가 비어 있으면 Figure를 만들지 않고 바로 반환
+        if not any(final_allocation.values()):
+            print("   ⚠️ 배분 결과가 없어 히트맵 생성을 건너뜁니다")
+            empty_result = {
+                'selected_stores': [],
+                'selected_skus': [],
+                'matrix_data': np.zeros((0, 0), dtype=np.int32),
+                'total_allocated': 0,
+                'fill_rate': 0.0
+            }
+            if return_array:
+                empty_result['image'] = None
+            return empty_result
+        
+        # SKU별 컬러/사이즈 정보는 딕셔너리로 한 번만 만들어 조회 (SKU마다 DataFrame 필터링 방지)
+        sku_meta = (df_sku_filtered.drop_duplicates('SKU')
+                    .set_index('SKU')[['COLOR_CD', 'SIZE_CD']].to_dict('index'))
+        
+        def _fallback_split(sku):
+            parts = sku.split('_')
+            color = parts[1] if len(parts) >= 3 else 'Unknown'
+            size = parts[2] if len(parts) >= 3 else 'Unknown'
+            return color, size
+        
+        def get_color_size(sku):
+            """SKU의 (컬러, 사이즈) 반환 (데이터에 없으면 SKU 코드에서 추출)"""
+            info = sku_meta.get(sku)
+            if info is not None:
+                return info['COLOR_CD'], info['SIZE_CD']
+            return _fallback_split(sku)
+        
+        # 1. 배분 결과를 매장 × SKU 행렬로 한 번에 변환 (딕셔너리는 한 번만 순회)
+        store_idx = {store: i for i, store in enumerate(target_stores)}
+        sku_idx = {sku: i for i, sku in enumerate(SKUs)}
+        full_mat = np.zeros((len(target_stores), len(SKUs)), dtype=np.int32)
+        for (sku, store), qty in final_allocation.items():
+            if store in store_idx and sku in sku_idx:
+                full_mat[store_idx[store], sku_idx[sku]] = qty
+        store_totals = full_mat.sum(axis=1)
+        
+        # 배분이 있는 매장들만 필터링하고 QTY_SUM 기준 내림차순 정렬
+        allocated_rows = np.flatnonzero(store_totals > 0)
+        qsum_arr = np.array([QSUM[target_stores[r]] for r in allocated_rows])
+        top_store_rows = allocated_rows[np.argsort(-qsum_arr, kind='stable')][:max_stores]
+        selected_stores = [target_stores[r] for r in top_store_rows]
         
         # 2. 배분이 있는 SKU들만 필터링하고 컬러-사이즈 기준으로 정렬
+        # SKU별 합계는 선택된 매장 기준
+        sku_totals = full_mat[top_store_rows].sum(axis=0)
+        
         allocated_skus = []
-        for sku in SKUs:
-            sku_total = sum(final_allocation.get((sku, store), 0) for store in selected_stores)
+        for col, sku in enumerate(SKUs):
+            sku_total = int(sku_totals[col])
             if sku_total > 0:
-                try:
-                    sku_info = df_sku_filtered[df_sku_filtered['SKU'] == sku].iloc[0]
-                    color = sku_info['COLOR_CD']
-                    size = sku_info['SIZE_CD']
-                    allocated_skus.append((sku, sku_total, color, size))
-                except:
-                    parts = sku.split('_')
-                    color = parts[1] if len(parts) >= 3 else 'Unknown'
-                    size = parts[2] if len(parts) >= 3 else 'Unknown'
-                    allocated_skus.append((sku, sku_total, color, size))
+                color, size = get_color_size(sku)
+                allocated_skus.append((sku, sku_total, color, size))
         
         # 사이즈 정렬 순서 정의
         def get_size_sort_key(size):
@@ -314,81 +441,49 @@ Performance Summary
             if size in text_sizes:
                 return (0, text_sizes[size])  # 문자 사이즈가 숫자 사이즈보다 우선
             
-            # 숫자 사이즈인 경우
-            try:
-                numeric_size = int(size)
-                return (1, numeric_size)  # 숫자 사이즈는 두 번째 그룹
-            except:
-                return (2, size)  # 알 수 없는 사이즈는 마지막
-        
-        # 컬러 오름차순, 같은 컬러 내에서 사이즈 순서로 정렬
-        allocated_skus.sort(key=lambda x: (x[2], get_size_sort_key(x[3])))
-        selected_skus = [sku[0] for sku in allocated_skus[:max_skus]]
-        
-        # 3. 매트릭스 데이터 생성
-        matrix_data = []
-        store_labels = []
-        
-        for store in selected_stores:
-            row = []
-            for sku in selected_skus:
-                qty = final_allocation.get((sku, store), 0)
-                row.append(qty)
-            matrix_data.append(row)
-            
-            # 매장 라벨 (매장ID + QTY_SUM)
-            store_labels.append(f"{store}\n({QSUM[store]:,})")
+            # 숫자 사이즈인 경우 (예외 기반 int() 파싱 대신 isdigit 검사)
+            size_str = str(size).strip()
+            if size_str.isdigit():
+                return (1, int(size_str))  # 숫자 사이즈는 두 번째 그룹
+            return (2, size_str)  # 알 수 없는 사이즈는 마지막
+        
+        # 컬러 오름차순, 같은 컬러 내에서 사이즈 순서로 정렬 (정렬 키는 SKU당 한 번만 계산)
+        keyed_skus = [((color, get_size_sort_key(size)), sku, color, size)
+                      for sku, _, color, size in allocated_skus]
+        keyed_skus.sort(key=lambda t: t[0])
+        selected_entries = keyed_skus[:max_skus]
+        selected_skus = [entry[1] for entry in selected_entries]
+        
+        # 3. 매트릭스 데이터 생성 (전체 행렬에서 선택된 행/열만 잘라냄)
+        top_sku_cols = np.array([sku_idx[sku] for sku in selected_skus], dtype=np.intp)
+        matrix_data = full_mat[np.ix_(top_store_rows, top_sku_cols)]
+        
+        # 매장 라벨 (매장ID + QTY_SUM)
+        store_labels = [f"{store}\n({QSUM[store]:,})" for store in selected_stores]
         
         # 4. SKU 라벨 및 컬러 그룹 정보 생성
-        sku_labels = []
-        color_groups = []  # 컬러별 그룹 정보
-        current_color = None
-        color_start_idx = 0
-        
-        for i, sku in enumerate(selected_skus):
-            try:
-                sku_info = df_sku_filtered[df_sku_filtered['SKU'] == sku].iloc[0]
-                color = sku_info['COLOR_CD']
-                size = sku_info['SIZE_CD'] 
-                sku_labels.append(f"{color}\n{size}")  # 컬러-사이즈 통합 표시
-                
-                # 컬러 그룹 변경 감지
-                if current_color != color:
-                    if current_color is not None:
-                        # 이전 그룹 완료
-                        color_groups.append((current_color, color_start_idx, i-1))
-                    current_color = color
-                    color_start_idx = i
-                    
-            except:
-                parts = sku.split('_')
-                color = parts[1] if len(parts) >= 3 else 'Unknown'
-                size = parts[2] if len(parts) >= 3 else 'Unknown'
-                sku_labels.append(f"{color}\n{size}")
-                
-                if current_color != color:
-                    if current_color is not None:
-                        color_groups.append((current_color, color_start_idx, i-1))
-                    current_color = color
-                    color_start_idx = i
-        
-        # 마지막 그룹 추가
-        if current_color is not None:
-            color_groups.append((current_color, color_start_idx, len(selected_skus)-1))
+        # 컬러/사이즈는 정렬 단계에서 이미 조회했으므로 그대로 재사용
+        sku_labels = [f"{color}\n{size}" for _, _, color, size in selected_entries]  # 컬러-사이즈 통합 표시
+        
+        # 컬러별 그룹 정보 (정렬된 순서에서 연속된 같은 컬러 구간)
+        color_groups = []
+        for color, group in groupby(enumerate(selected_entries), key=lambda t: t[1][2]):
+            idxs = [i for i, _ in group]
+            color_groups.append((color, idxs[0], idxs[-1]))
         
         # 5. 히트맵 생성
-        fig, ax = plt.subplots(figsize=(max(12, len(selected_skus) * 0.8), 
-                                       max(8, len(selected_stores) * 0.4)))
+        fig, ax = self._get_pooled_figure('matrix', 1, 1,
+                                          figsize=(max(12, len(selected_skus) * 0.8), 
+                                                   max(8, len(selected_stores) * 0.4)))
         
         # 컬러맵: 0은 흰색, 배분량에 따라 색상 진해짐
-        matrix_data = np.array(matrix_data)
         if matrix_data.max() > 0:
-            im = ax.imshow(matrix_data, cmap='Blues', aspect='auto', vmin=0)
+            im = ax.imshow(matrix_data, cmap=self._heatmap_cmap, aspect='auto', vmin=0)
         else:
-            im = ax.imshow(matrix_data, cmap='Blues', aspect='auto')
+            im = ax.imshow(matrix_data, cmap=self._heatmap_cmap, aspect='auto')
         
         # 컬러바 추가
-        cbar = plt.colorbar(im, ax=ax, shrink=0.8)
+        cbar = self._add_pooled_colorbar('matrix', im, ax=ax, shrink=0.8)
         cbar.set_label('Allocated Quantity', rotation=270, labelpad=15)
         
         # 축 설정
@@ -402,20 +497,23 @@ Performance Summary
             if end_idx < len(selected_skus) - 1:  # 마지막 그룹이 아닌 경우
                 ax.axvline(x=end_idx + 0.5, color='red', linestyle='--', linewidth=2, alpha=0.8)
         
-        # 그리드 추가
-        ax.set_xticks(np.arange(len(selected_skus)+1)-0.5, minor=True)
-        ax.set_yticks(np.arange(len(selected_stores)+1)-0.5, minor=True)
-        ax.grid(which='minor', color='lightgray', linestyle='-', linewidth=0.5)
-        
-        # 텍스트 추가 (배분량 표시)
-        for i in range(len(selected_stores)):
-            for j in range(len(selected_skus)):
-                qty = matrix_data[i, j]
-                if qty > 0:
-                    # 배분량에 따라 텍스트 색상 조정
-                    text_color = 'white' if qty > matrix_data.max() * 0.6 else 'black'
-                    ax.text(j, i, str(int(qty)), ha='center', va='center', 
-                           color=text_color, fontweight='bold', fontsize=8)
+        # 그리드 추가 (셀 경계선을 LineCollection 하나로 그림, minor tick 그리드 대비 아티스트 수 절감)
+        n_rows, n_cols = len(selected_stores), len(selected_skus)
+        grid_segments = (
+            [((j - 0.5, -0.5), (j - 0.5, n_rows - 0.5)) for j in range(n_cols + 1)] +
+            [((-0.5, i - 0.5), (n_cols - 0.5, i - 0.5)) for i in range(n_rows + 1)]
+        )
+        ax.add_collection(LineCollection(grid_segments, colors='lightgray', linewidths=0.5, zorder=1.5),
+                          autolim=False)
+        
+        # 텍스트 추가 (배분량 표시) - 0이 아닌 셀만 순회
+        nz = np.argwhere(matrix_data > 0)
+        nz_values = matrix_data[nz[:, 0], nz[:, 1]]
+        # 배분량에 따라 텍스트 색상 조정 (임계값은 한 번만 계산)
+        dark_mask = nz_values > matrix_data.max() * 0.6
+        for (i, j), is_dark, qty in zip(nz, dark_mask, nz_values):
+            ax.text(j, i, str(int(qty)), ha='center', va='center', 
+                   color='white' if is_dark else 'black', fontweight='bold', fontsize=8)
         
         # 제목 및 라벨
         ax.set_title(f'SKU Allocation Matrix\n(Top {len(selected_stores)} Stores × Top {len(selected_skus)} SKUs)', 
@@ -431,12 +529,14 @@ Performance Summary
         
         # 컬러 그룹별 배경색 추가 (옵션)
         group_colors = ['lightcyan', 'lightpink', 'lightgreen', 'lightyellow', 'lightcoral']
-        for i, (color, start_idx, end_idx) in enumerate(color_groups):
-            bg_color = group_colors[i % len(group_colors)]
-            # 컬러 그룹 배경 사각형 추가
-            rect = plt.Rectangle((start_idx-0.5, -0.5), end_idx-start_idx+1, len(selected_stores), 
-                               facecolor=bg_color, alpha=0.1, zorder=0)
-            ax.add_patch(rect)
+        # 컬러 그룹 배경 사각형들을 PatchCollection 하나로 추가
+        group_rects = [Rectangle((start_idx-0.5, -0.5), end_idx-start_idx+1, len(selected_stores))
+                       for _, start_idx, end_idx in color_groups]
+        ax.add_collection(PatchCollection(
+            group_rects,
+            facecolors=[group_colors[i % len(group_colors)] for i in range(len(color_groups))],
+            edgecolors='none', alpha=0.1, zorder=0
+        ), autolim=False)
         
         stats_text = f"Total Allocated: {total_allocated:,}\nFilled Cells: {filled_combinations}/{total_combinations} ({fill_rate:.1f}%)"
         ax.text(0.02, 0.98, stats_text, transform=ax.transAxes, fontsize=10,
@@ -446,10 +546,9 @@ Performance Summary
         
         # 저장 또는 표시
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight', facecolor='white')
+            self._save_figure(fig, save_path, facecolor='white')
             print(f"   📊 배분 매트릭스 저장: {save_path}")
-            plt.close()
-        else:
+        elif show and not self.headless:
             plt.show()
         
         # 요약 정보 출력
@@ -459,10 +558,47 @@ Performance Summary
         print(f"      총 배분량: {total_allocated:,}개")
         print(f"      배분 채움률: {fill_rate:.1f}% ({filled_combinations}/{total_combinations})")
         
-        return {
+        result = {
             'selected_stores': selected_stores,
             'selected_skus': selected_skus,
             'matrix_data': matrix_data,
             'total_allocated': total_allocated,
             'fill_rate': fill_rate
-        }
\ No newline at end of file
+        }
+        if return_array:
+            # 파일을 거치지 않고 캔버스 버퍼를 바로 배열로 변환
+            fig.canvas.draw()
+            result['image'] = np.asarray(fig.canvas.buffer_rgba()).copy()
+        return result
+    
+    def create_all_visualizations(self, analysis_results, target_style, allocation_args, save_path):
+        """
+        종합 시각화, 요약 차트, 배분 매트릭스 히트맵을 하나의 다중 페이지 PDF로 저장
+        
+        Args:
+            analysis_results: 분석 결과 딕셔너리
+            target_style: 대상 스타일 코드
+            allocation_args: create_allocation_matrix_heatmap에 전달할 인자 딕셔너리
+                (final_allocation, target_stores, SKUs, QSUM, df_sku_filtered, max_stores, max_skus 등)
+            save_path: PDF 저장 경로
+        
+        Returns:
+            create_allocation_matrix_heatmap의 결과 딕셔너리
+        """
+        # 페이지를 모으는 동안에는 화면 표시 생략, 차트 하나를 기록할 때마다 닫아 Figure는 최대 1개만 유지
+        with PdfPages(save_path) as pdf:
+            fig = self.create_comprehensive_visualization(analysis_results, target_style, show=False)
+            pdf.savefig(fig, facecolor='white')
+            self.close()
+            
+            fig = self.create_simple_summary_chart(analysis_results, show=False)
+            pdf.savefig(fig, facecolor='white')
+            self.close()
+            
+            matrix_result = self.create_allocation_matrix_heatmap(**allocation_args, show=False)
+            if matrix_result['selected_stores']:  # 배분이 없으면 히트맵 페이지 생략
+                pdf.savefig(self._fig_pool['matrix']['fig'], facecolor='white')
+            self.close()
+        
+        print(f"📊 전체 시각화 PDF 저장: {save_path}")
+        return matrix_result
@@ -103,6 +103,8 @@ DEFAULT_TARGET_STYLE = "DWLG42044"
 DEFAULT_SCENARIO = "deterministic"
 
 # 실험 시나리오 설정 (고급 방식 관련 시나리오 제거)
+# 선택 키 "solver_threads": Step 1 CBC 병렬 스레드 수 (미지정 시 단일 스레드)
+#   병렬 분기 한정은 실행마다 동점 최적해 중 다른 해를 고를 수 있어 Step 2/3 배분 결과가 달라질 수 있음
 EXPERIMENT_SCENARIOS = {    
     # 추가 3-Step 시나리오들 (정규화 방식 적용)
     "deterministic": {
@@ -123,6 +125,7 @@ EXPERIMENT_SCENARIOS = {
         "description": "랜덤 배분",
         "coverage_weight": 1.0,
         "priority_temperature": 1.0,
+        # "seed": 42,  # 지정하면 무작위 매장 우선순위가 실행마다 동일하게 재현됨
         "coverage_method": "normalized"
     },
     
@@ -139,5 +142,14 @@ EXPERIMENT_SCENARIOS = {
         "coverage_weight": 1.0,
         "priority_temperature": 0.0,
         "coverage_method": "normalized"
+    },
+    
+    # Step 1 솔버 비교 시나리오 (highspy 또는 highs 실행 파일 필요, 없으면 CBC 사용)
+    "highs_solver": {
+        "description": "결정론적 배분 (Step 1 MILP를 HiGHS로 풀이)",
+        "coverage_weight": 1.0,
+        "priority_temperature": 0.0,
+        "coverage_method": "normalized",
+        "step1_solver": "highs"
     }
 }
\ No newline at end of file
@@ -5,6 +5,7 @@ SKU 분배 최적화 메인 실행 파일
 import sys
 import os
 import time
+import matplotlib
 
 # 모듈 import를 위한 경로 추가
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -113,7 +114,7 @@ def run_optimization(target_style=DEFAULT_TARGET_STYLE, scenario=DEFAULT_SCENARI
         # 8. 시각화 (옵션)
         if create_visualizations:
             print("\n📈 8단계: 시각화 생성")
-            visualizer = ResultVisualizer()
+            visualizer = ResultVisualizer(headless=True)  # PNG 저장만 하므로 화면 표시 생략
             
             try:
                 # PNG 저장 경로 생성
@@ -294,6 +295,10 @@ def list_saved_experiments():
 if __name__ == "__main__":
     """메인 실행부"""
     
+    # 스크립트 실행은 PNG 저장만 하므로 GUI 없는 Agg 백엔드 사용 (MPLBACKEND 지정 시 그 값을 따름)
+    if 'MPLBACKEND' not in os.environ:
+        matplotlib.use('Agg')
+    
     print("🔧 SKU 분배 최적화 시스템")
     print("="*50)
     
@@ -330,9 +330,6 @@ class IntegratedOptimizer:
     
     def _create_allocation_maximization_term(self, x, SKUs, target_stores, allocation_priority, QSUM):
         """배분량 최대화 항 생성 (배분 우선순위 옵션 적용)"""
-        import math
-        import random
-        
         # 배분 우선순위 옵션 정보 가져오기
         from config import ALLOCATION_PRIORITY_OPTIONS
         
@@ -343,40 +340,34 @@ class IntegratedOptimizer:
         weight_function = priority_config['weight_function']
         randomness = priority_config['randomness']
         
-        # 매장별 가중치 계산
-        store_weights = {}
-        max_qsum = max(QSUM.values()) if QSUM.values() else 1
-        
-        for i, store in enumerate(target_stores):
-            base_weight = 1.0
-            qsum_normalized = QSUM[store] / max_qsum
-            
-            # 기본 가중치 함수 적용
-            if weight_function == 'linear_descending':
-                # 상위 매장일수록 높은 가중치 (선형)
-                base_weight = 1.0 - (i / len(target_stores))
-            elif weight_function == 'log_descending':
-                # 상위 매장일수록 높은 가중치 (로그)
-                base_weight = math.log(len(target_stores) - i + 1) / math.log(len(target_stores) + 1)
-            elif weight_function == 'sqrt_descending':
-                # 상위 매장일수록 높은 가중치 (제곱근)
-                base_weight = math.sqrt(len(target_stores) - i) / math.sqrt(len(target_stores))
-            elif weight_function == 'uniform':
-                # 모든 매장 동일 가중치
-                base_weight = 1.0
-            
-            # 랜덤성 적용
-            if randomness > 0:
-                random_factor = random.uniform(0.5, 1.5)  # 0.5 ~ 1.5 사이 랜덤
-                base_weight = base_weight * (1 - randomness) + random_factor * randomness
-            
-            store_weights[store] = base_weight
+        # 매장별 가중치 계산 (매장 순위 인덱스 벡터로 한 번에 계산)
+        n_stores = len(target_stores)
+        idx = np.arange(n_stores)
+        
+        # 기본 가중치 함수 적용
+        if weight_function == 'linear_descending':
+            # 상위 매장일수록 높은 가중치 (선형)
+            base_weights = 1.0 - idx / n_stores
+        elif weight_function == 'log_descending':
+            # 상위 매장일수록 높은 가중치 (로그)
+            base_weights = np.log(n_stores - idx + 1) / math.log(n_stores + 1)
+        elif weight_function == 'sqrt_descending':
+            # 상위 매장일수록 높은 가중치 (제곱근)
+            base_weights = np.sqrt(n_stores - idx) / math.sqrt(n_stores)
+        else:
+            # uniform: 모든 매장 동일 가중치
+            base_weights = np.ones(n_stores)
+        
+        # 랜덤성 적용
+        if randomness > 0:
+            random_factors = np.random.uniform(0.5, 1.5, n_stores)  # 0.5 ~ 1.5 사이 랜덤
+            base_weights = base_weights * (1 - randomness) + random_factors * randomness
         
         # 가중치 정규화 (합이 1이 되도록)
-        total_weight = sum(store_weights.values())
+        total_weight = base_weights.sum()
         if total_weight > 0:
-            for store in store_weights:
-                store_weights[store] /= total_weight
+            base_weights = base_weights / total_weight
+        store_weights = dict(zip(target_stores, base_weights.tolist()))
         
         # 배분량 최대화 항 생성 (낮은 가중치로 3순위 유지)
         allocation_components = []
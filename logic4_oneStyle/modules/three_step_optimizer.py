@@ -6,12 +6,18 @@ from pulp import (
     LpProblem, LpVariable, LpBinary, LpInteger,
     LpMaximize, lpSum, PULP_CBC_CMD, value
 )
+from collections import defaultdict
 import numpy as np
 import time
-import random
 import math
 
 
+def _fill_in_priority_order(remaining, capacities):
+    """우선순위 순으로 정렬된 매장 용량 배열에 remaining을 앞에서부터 한도까지 채운 배분량 반환"""
+    filled_before = np.cumsum(capacities) - capacities
+    return np.clip(remaining - filled_before, 0, capacities)
+
+
 class ThreeStepOptimizer:
     """3-Step 최적화를 담당하는 클래스
     
@@ -24,8 +30,11 @@ class ThreeStepOptimizer:
         self.target_style = target_style
         self.step1_prob = None
         self.step1_allocation = {}
+        self.step1_sku_totals = {}  # SKU별 Step 1 배분 합계
         self.final_allocation = {}
         self.allocation_after_step2 = {}
+        self.final_allocation_arr = None  # Step 3 이후 (SKU × 대상 매장) 배분량 배열
+        self.rng = np.random.default_rng()  # 매장 우선순위 무작위 가중치용 난수 생성기
         
         # 각 단계별 메트릭
         self.step1_time = 0
@@ -50,6 +59,9 @@ class ThreeStepOptimizer:
         if 'priority_temperature' in scenario_params:
             print(f"   우선순위 temperature: {scenario_params['priority_temperature']}")
         
+        # 시나리오에 seed가 있으면 무작위 우선순위를 재현 가능하게 고정 (없으면 매 실행 다름)
+        self.rng = np.random.default_rng(scenario_params.get('seed'))
+        
         # Step 1: 바이너리 커버리지 최적화
         step1_result = self._step1_coverage_optimization(
             data, SKUs, stores, target_stores, store_allocation_limits, 
@@ -93,7 +105,7 @@ class ThreeStepOptimizer:
         self.step1_prob = LpProblem("Step1_Coverage_Optimization", LpMaximize)
         
         # 2. 바이너리 변수 및 커버리지 변수 생성
-        b = self._create_binary_variables(SKUs, stores, target_stores)
+        b = self._create_binary_variables(SKUs, target_stores)
         color_coverage, size_coverage = self._create_coverage_variables(stores, target_stores, K_s, L_s)
         
         # 3. 커버리지 목적함수 설정 (스타일별 색상/사이즈 개수 반영)
@@ -105,13 +117,16 @@ class ThreeStepOptimizer:
             self._set_coverage_objective(color_coverage, size_coverage, stores, target_stores, K_s, L_s)
         
         # 4. 제약조건 추가
-        self._add_step1_constraints(b, color_coverage, size_coverage, SKUs, stores, 
-                                   target_stores, store_allocation_limits, 
-                                   df_sku_filtered, K_s, L_s, data)
+        color_sku_groups, size_sku_groups = self._add_step1_constraints(
+            b, color_coverage, size_coverage, SKUs, stores, 
+            target_stores, store_allocation_limits, 
+            df_sku_filtered, K_s, L_s, data
+        )
         
-        # 5. 최적화 실행
+        # 5. 최적화 실행 (greedy 커버리지 해를 초기해로 넣어 B&B 탐색 단축)
         # print(f"   🔍 MILP 최적화 시작...")
-        self.step1_prob.solve(PULP_CBC_CMD(msg=0))
+        self._set_step1_warm_start(b, SKUs, target_stores, color_sku_groups, size_sku_groups, data['A'])
+        self.step1_prob.solve(self._create_step1_solver(scenario_params))
         
         end_time = time.time()
         self.step1_time = end_time - start_time
@@ -120,12 +135,10 @@ class ThreeStepOptimizer:
         if self.step1_prob.status == 1:  # 최적해 찾음
             print(f"   ✅ Step1 최적화 성공 ({self.step1_time:.2f}초)")
             
-            # 선택된 조합 추출
-            selected_combinations = []
-            for i in SKUs:
-                for j in stores:
-                    if j in target_stores and b[i][j].varValue and b[i][j].varValue > 0.5:
-                        selected_combinations.append((i, j))
+            # 선택된 조합 추출 (대상 매장 열만 읽은 SKU × 매장 배열에서 0이 아닌 칸만)
+            step1_matrix = self._extract_step1_matrix(b, SKUs, target_stores)
+            sku_rows, store_cols = np.nonzero(step1_matrix)
+            selected_combinations = [(SKUs[r], target_stores[c]) for r, c in zip(sku_rows, store_cols)]
             
             # 목적함수 값 계산
             self.step1_objective = value(self.step1_prob.objective)
@@ -141,6 +154,7 @@ class ThreeStepOptimizer:
             
             # Store Step1 allocation for external access (visualization)
             self.step1_allocation = step1_allocation.copy()
+            self.step1_sku_totals = dict(zip(SKUs, step1_matrix.sum(axis=1).tolist()))
             
             return {
                 'status': 'success',
@@ -172,37 +186,33 @@ class ThreeStepOptimizer:
         
         total_additional = 0
         
+        # 우선순위 가중치는 SKU와 무관하므로 매장 정렬은 한 번만 수행 (동점은 기존 순서 유지)
+        sorted_target_stores = sorted(
+            target_stores, key=lambda j: store_priority_weights.get(j, 0), reverse=True
+        )
+        
+        # 공급량이 0인 SKU는 배분할 것이 없으므로 미리 제외
+        active_skus = [i for i in SKUs if data['A'][i] > 0]
+        
         # 각 SKU에 대해 처리
-        for i in SKUs:
-            # 현재 해당 SKU를 받지 못한 매장들 찾기
-            unfilled_stores = []
-            for j in target_stores:
-                if (i, j) not in self.final_allocation or self.final_allocation[(i, j)] == 0:
-                    unfilled_stores.append(j)
+        for i in active_skus:
+            # 현재 해당 SKU를 받지 못한 매장들 찾기 (우선순위 순서 그대로)
+            unfilled_stores = [
+                j for j in sorted_target_stores if self.final_allocation.get((i, j), 0) == 0
+            ]
             
             if not unfilled_stores:
                 continue
                 
-            # 남은 수량 계산
-            allocated_quantity = sum(
-                self.final_allocation.get((i, j), 0) 
-                for j in target_stores
-            )
-            remaining_quantity = data['A'][i] - allocated_quantity
+            # 남은 수량 계산 (Step 2는 SKU마다 한 번만 처리하므로 이 시점 배분량은 Step 1 합계와 같음)
+            remaining_quantity = data['A'][i] - self.step1_sku_totals.get(i, 0)
             
             if remaining_quantity <= 0:
                 continue
             
-            # 우선순위에 따라 매장 정렬
-            weighted_stores = [
-                (j, store_priority_weights.get(j, 0)) 
-                for j in unfilled_stores
-            ]
-            weighted_stores.sort(key=lambda x: x[1], reverse=True)
-            
             # 1개씩 배분
             allocated_this_sku = 0
-            for j, weight in weighted_stores:
+            for j in unfilled_stores:
                 if allocated_this_sku >= remaining_quantity:
                     break
                     
@@ -248,56 +258,47 @@ class ThreeStepOptimizer:
         
         total_additional = 0
         
+        # 매장별 한도/가중치는 SKU와 무관하므로 배열로 한 번만 준비
+        n_stores = len(target_stores)
+        limit_arr = np.array([store_allocation_limits.get(j, 0) for j in target_stores], dtype=np.int64)
+        weight_arr = np.array([store_priority_weights.get(j, 0) for j in target_stores], dtype=float)
+        # 우선순위 순서는 SKU와 무관하므로 한 번만 정렬 (동점은 기존 순서 유지)
+        priority_order = np.argsort(-weight_arr, kind='stable')
+        
+        # 최종 배분량을 (SKU × 대상 매장) 배열로도 함께 유지 (요약 집계용)
+        self.final_allocation_arr = np.zeros((len(SKUs), n_stores), dtype=np.int64)
+        
+        # 공급량이 0인 SKU는 배분할 것이 없으므로 미리 제외
+        active_skus = [(row, i) for row, i in enumerate(SKUs) if data['A'][i] > 0]
+        
         # 각 SKU에 대해 처리
-        for i in SKUs:
+        for row, i in active_skus:
             # 남은 수량 계산
-            allocated_quantity = sum(
-                self.final_allocation.get((i, j), 0) 
-                for j in target_stores
+            current_arr = np.fromiter(
+                (self.final_allocation.get((i, j), 0) for j in target_stores),
+                dtype=np.int64, count=n_stores
             )
-            remaining_quantity = data['A'][i] - allocated_quantity
+            self.final_allocation_arr[row] = current_arr
+            remaining_quantity = data['A'][i] - int(current_arr.sum())
             
             if remaining_quantity <= 0:
                 continue
             
             # 추가 배분 가능한 매장들 찾기
-            eligible_stores = []
-            for j in target_stores:
-                current_qty = self.final_allocation.get((i, j), 0)
-                max_qty_per_sku = store_allocation_limits.get(j, 0)
-                if current_qty < max_qty_per_sku:
-                    eligible_stores.append(j)
+            capacity_arr = limit_arr - current_arr
+            # 미리 정렬한 우선순위 순서에서 추가 배분 가능한 매장만 남김
+            order = priority_order[capacity_arr[priority_order] > 0]
             
-            if not eligible_stores:
+            if order.size == 0:
                 continue
-                
-            # 우선순위에 따라 매장 정렬
-            weighted_stores = [
-                (j, store_priority_weights.get(j, 0)) 
-                for j in eligible_stores
-            ]
-            weighted_stores.sort(key=lambda x: x[1], reverse=True)
             
-            # 가능한 만큼 배분
-            for j, weight in weighted_stores:
-                if remaining_quantity <= 0:
-                    break
-                
-                # 해당 매장에 추가 배분 가능한 수량 계산
-                current_qty = self.final_allocation.get((i, j), 0)
-                max_qty_per_sku = store_allocation_limits.get(j, 0)
-                available_capacity = max_qty_per_sku - current_qty
-                
-                if available_capacity <= 0:
-                    continue
-                
-                # 배분할 수량 결정
-                allocate_quantity = min(remaining_quantity, available_capacity)
-                
-                # 배분 실행
-                self.final_allocation[(i, j)] = self.final_allocation.get((i, j), 0) + allocate_quantity
-                remaining_quantity -= allocate_quantity
-                total_additional += allocate_quantity
+            # 가능한 만큼 배분 (우선순위 순으로 한도까지 채우는 과정을 누적합으로 한 번에 계산)
+            allocate_arr = _fill_in_priority_order(remaining_quantity, capacity_arr[order])
+            for k in np.flatnonzero(allocate_arr):
+                idx = order[k]
+                self.final_allocation[(i, target_stores[idx])] = int(current_arr[idx] + allocate_arr[k])
+            self.final_allocation_arr[row, order] += allocate_arr
+            total_additional += int(allocate_arr.sum())
         
         self.step3_time = time.time() - start_time
         # Store additional allocation count for step analysis
@@ -312,26 +313,42 @@ class ThreeStepOptimizer:
             'time': self.step3_time
         }
     
-    def _create_binary_variables(self, SKUs, stores, target_stores):
-        """바이너리 할당 변수 생성"""
-        b = {}
-        for i in SKUs:
-            b[i] = {}
-            for j in stores:
-                if j in target_stores:
-                    b[i][j] = LpVariable(f'b_{i}_{j}', cat=LpBinary)
-                else:
-                    b[i][j] = 0
-        return b
+    def _create_step1_solver(self, scenario_params):
+        """Step 1 MILP 솔버 생성 (step1_solver='highs'이면 HiGHS 사용, 미설치 시 CBC로 대체)"""
+        if scenario_params.get('step1_solver', 'cbc') == 'highs':
+            # HiGHS 클래스는 최신 PuLP에만 있으므로 필요할 때만 import
+            try:
+                from pulp import HiGHS, HiGHS_CMD
+            except ImportError:
+                candidates = ()
+            else:
+                # highspy가 있으면 프로세스 내 호출, 없으면 highs 실행 파일 사용
+                candidates = (HiGHS(msg=0, warmStart=True), HiGHS_CMD(msg=0, warmStart=True))
+            
+            for solver in candidates:
+                if solver.available():
+                    return solver
+            print(f"   ⚠️ HiGHS 솔버를 찾을 수 없어 CBC로 최적화합니다")
+        
+        # 병렬 분기 한정은 동점 최적해 중 다른 해를 고를 수 있어 기본은 단일 스레드 (solver_threads로 지정)
+        return PULP_CBC_CMD(msg=0, warmStart=True, threads=scenario_params.get('solver_threads'))
+    
+    def _create_binary_variables(self, SKUs, target_stores):
+        """바이너리 할당 변수 생성 (대상 매장만 보관, 대상 외 매장은 항상 0이라 항목을 만들지 않음)"""
+        return {
+            i: {j: LpVariable(f'b_{i}_{j}', cat=LpBinary) for j in target_stores}
+            for i in SKUs
+        }
     
     def _create_coverage_variables(self, stores, target_stores, K_s, L_s):
         """커버리지 변수 생성"""
         color_coverage = {}
         size_coverage = {}
         s = self.target_style
+        target_set = set(target_stores)
         
         for j in stores:
-            if j in target_stores:
+            if j in target_set:
                 color_coverage[(s,j)] = LpVariable(f"color_coverage_{s}_{j}", 
                                                  lowBound=0, upBound=len(K_s[s]), cat=LpInteger)
                 size_coverage[(s,j)] = LpVariable(f"size_coverage_{s}_{j}", 
@@ -359,9 +376,11 @@ class ThreeStepOptimizer:
         size_weight = 1.0 / total_sizes if total_sizes > 0 else 1.0
         
         # 정규화된 커버리지 합계 최대화 (스타일 간 공정 비교 가능)
+        # 대상 매장에만 커버리지 변수가 있으므로 isinstance 대신 집합 조회로 판별
+        target_set = set(target_stores)
         normalized_coverage_sum = lpSum(
             color_weight * color_coverage[(s,j)] + size_weight * size_coverage[(s,j)]
-            for j in stores if j in target_stores and isinstance(color_coverage[(s,j)], LpVariable)
+            for j in stores if j in target_set
         )
         
         self.step1_prob += normalized_coverage_sum
@@ -377,9 +396,10 @@ class ThreeStepOptimizer:
         s = self.target_style
         
         # 색상 + 사이즈 커버리지 합계만 최대화 (원래 방식)
+        target_set = set(target_stores)
         coverage_sum = lpSum(
             color_coverage[(s,j)] + size_coverage[(s,j)] 
-            for j in stores if j in target_stores and isinstance(color_coverage[(s,j)], LpVariable)
+            for j in stores if j in target_set
         )
         
         self.step1_prob += coverage_sum
@@ -394,54 +414,45 @@ class ThreeStepOptimizer:
         """Step 1 제약조건 추가"""
         
         # 1. 각 SKU는 최대 1개만 배분 (바이너리)
+        # 대상 매장의 변수만 SKU별 리스트로 한 번 모아 두고 그대로 합산 (isinstance 검사 제거)
+        target_b_rows = {i: [b[i][j] for j in target_stores] for i in SKUs}
         for i in SKUs:
-            sku_allocation = lpSum(
-                b[i][j] for j in stores if isinstance(b[i][j], LpVariable)
-            )
-            self.step1_prob += sku_allocation <= data['A'][i]  # 공급량 제한
+            self.step1_prob += lpSum(target_b_rows[i]) <= data['A'][i]  # 공급량 제한
         
         # 2. 커버리지 제약조건
-        self._add_coverage_constraints_step1(b, color_coverage, size_coverage, SKUs, stores, 
-                                           target_stores, K_s, L_s, df_sku_filtered)
+        color_sku_groups, size_sku_groups = self._add_coverage_constraints_step1(
+            b, color_coverage, size_coverage, SKUs, stores, 
+            target_stores, K_s, L_s, df_sku_filtered
+        )
         
         print(f"   📋 제약조건: 바이너리 배분 + 커버리지")
+        return color_sku_groups, size_sku_groups
     
     def _add_coverage_constraints_step1(self, b, color_coverage, size_coverage, SKUs, stores, 
                                       target_stores, K_s, L_s, df_sku_filtered):
         """Step 1 커버리지 제약조건"""
         s = self.target_style
         
-        # 색상별/사이즈별 SKU 그룹 미리 계산
-        color_sku_groups = {}
-        size_sku_groups = {}
+        # 색상별/사이즈별 SKU 그룹 미리 계산 (SKU마다 DataFrame을 필터링하지 않도록 딕셔너리로 한 번에 조회)
+        sku_info = df_sku_filtered.drop_duplicates('SKU').set_index('SKU')
+        color_map = sku_info['COLOR_CD'].to_dict()
+        size_map = sku_info['SIZE_CD'].to_dict()
+        
+        color_sku_groups = defaultdict(list)
+        size_sku_groups = defaultdict(list)
         
         for sku in SKUs:
-            try:
-                sku_info = df_sku_filtered.loc[df_sku_filtered['SKU']==sku].iloc[0]
-                color = sku_info['COLOR_CD']
-                size = sku_info['SIZE_CD']
-                
-                if color not in color_sku_groups:
-                    color_sku_groups[color] = []
-                color_sku_groups[color].append(sku)
-                
-                if size not in size_sku_groups:
-                    size_sku_groups[size] = []
-                size_sku_groups[size].append(sku)
-            except:
+            if sku not in color_map:
                 continue
+            color_sku_groups[color_map[sku]].append(sku)
+            size_sku_groups[size_map[sku]].append(sku)
         
-        for j in stores:
-            if j not in target_stores:
-                continue
-                
-            if not isinstance(color_coverage[(s,j)], LpVariable):
-                continue
-            
+        # 대상 매장에는 항상 바이너리 변수가 있으므로 isinstance 검사 없이 바로 합산
+        for j in target_stores:
             # 색상 커버리지 제약
             color_binaries = []
             for color, color_skus in color_sku_groups.items():
-                color_allocation = lpSum(b[sku][j] for sku in color_skus if isinstance(b[sku][j], LpVariable))
+                color_allocation = lpSum(b[sku][j] for sku in color_skus)
                 
                 color_binary = LpVariable(f"color_bin_{color}_{j}", cat=LpBinary)
                 
@@ -455,7 +466,7 @@ class ThreeStepOptimizer:
             # 사이즈 커버리지 제약
             size_binaries = []
             for size, size_skus in size_sku_groups.items():
-                size_allocation = lpSum(b[sku][j] for sku in size_skus if isinstance(b[sku][j], LpVariable))
+                size_allocation = lpSum(b[sku][j] for sku in size_skus)
                 
                 size_binary = LpVariable(f"size_bin_{size}_{j}", cat=LpBinary)
                 
@@ -465,17 +476,54 @@ class ThreeStepOptimizer:
                 size_binaries.append(size_binary)
             
             self.step1_prob += size_coverage[(s,j)] == lpSum(size_binaries)
+        
+        return color_sku_groups, size_sku_groups
     
-    def _save_step1_results(self, b, SKUs, stores):
-        """Step 1 결과 저장"""
-        self.step1_allocation = {}
+    def _set_step1_warm_start(self, b, SKUs, target_stores, color_sku_groups, size_sku_groups, A):
+        """Step 1 MILP 초기해 설정 (매장마다 색상 → 사이즈 순으로 미커버 항목에 SKU 1개씩 greedy 배정)"""
+        sku_size = {sku: size for size, size_skus in size_sku_groups.items() for sku in size_skus}
+        remaining = {sku: A[sku] for sku in SKUs}
+        chosen = set()
+        
+        for j in target_stores:
+            covered_sizes = set()
+            
+            # 색상별로 SKU 1개 선택 (가능하면 아직 커버되지 않은 사이즈의 SKU)
+            for color_skus in color_sku_groups.values():
+                candidates = [sku for sku in color_skus if remaining[sku] > 0]
+                if not candidates:
+                    continue
+                sku = next((c for c in candidates if sku_size[c] not in covered_sizes), candidates[0])
+                chosen.add((sku, j))
+                remaining[sku] -= 1
+                covered_sizes.add(sku_size[sku])
+            
+            # 아직 커버되지 않은 사이즈에 SKU 1개씩 추가
+            for size, size_skus in size_sku_groups.items():
+                if size in covered_sizes:
+                    continue
+                sku = next((c for c in size_skus if remaining[c] > 0 and (c, j) not in chosen), None)
+                if sku is None:
+                    continue
+                chosen.add((sku, j))
+                remaining[sku] -= 1
+                covered_sizes.add(size)
+        
         for i in SKUs:
-            for j in stores:
-                if isinstance(b[i][j], LpVariable):
-                    value = int(b[i][j].value()) if b[i][j].value() is not None else 0
-                    self.step1_allocation[(i, j)] = value
-                else:
-                    self.step1_allocation[(i, j)] = 0
+            for j in target_stores:
+                b[i][j].setInitialValue(1 if (i, j) in chosen else 0)
+    
+    def _extract_step1_matrix(self, b, SKUs, target_stores):
+        """Step 1 바이너리 변수 값을 (SKU × 대상 매장) int8 배열로 한 번에 추출 (대상 외 매장은 항상 0이라 제외)"""
+        n_stores = len(target_stores)
+        matrix = np.zeros((len(SKUs), n_stores), dtype=np.int8)
+        for row, i in enumerate(SKUs):
+            b_i = b[i]
+            matrix[row] = np.fromiter(
+                ((b_i[j].varValue or 0) > 0.5 for j in target_stores),
+                dtype=np.int8, count=n_stores
+            )
+        return matrix
     
     def _calculate_store_priorities(self, target_stores, QSUM, priority_temperature=0.0):
         """매장별 우선순위 가중치 계산
@@ -493,21 +541,20 @@ class ThreeStepOptimizer:
     
     def _compute_mixed_weights(self, target_stores, QSUM, alpha):
         """Deterministic(QSUM)과 Random 사이를 alpha로 혼합한 가중치 계산"""
-        import random
         # 1) QSUM 정규화 (0~1)
-        q_vals = [QSUM[j] for j in target_stores]
-        qmin, qmax = min(q_vals), max(q_vals)
+        q_vals = np.array([QSUM[j] for j in target_stores], dtype=float)
+        qmin, qmax = q_vals.min(), q_vals.max()
         if qmax > qmin:
-            w = {j: (QSUM[j] - qmin)/(qmax - qmin) for j in target_stores}
+            w = (q_vals - qmin) / (qmax - qmin)
         else:
-            w = {j: 1.0 for j in target_stores}
+            w = np.ones(len(target_stores))
 
-        # 2) 무작위 0~1 값
-        r = {j: random.random() for j in target_stores}
+        # 2) 무작위 0~1 값 (매장 수만큼 한 번에 추출)
+        r = self.rng.random(len(target_stores))
 
         # 3) 혼합 점수 계산
-        s = {j: (1-alpha)*w[j] + alpha*r[j] for j in target_stores}
-        return s
+        s = (1 - alpha) * w + alpha * r
+        return dict(zip(target_stores, s.tolist()))
     
     def _allocate_remaining_sku(self, sku, target_stores, A, tier_system, 
                               store_priority_weights, store_allocation_limits, priority_unfilled):
@@ -700,30 +747,28 @@ class ThreeStepOptimizer:
     def _get_optimization_summary(self, data, target_stores, step1_result, step2_result, step3_result):
         """Update summary to include step3 metrics"""
         
-        total_allocated = sum(self.final_allocation.values())
+        # 최종 배분 결과 설정
+        self.final_allocation = step3_result['allocation']
+        
+        # 총 배분량/배분받은 매장 수는 Step 3에서 유지한 배열로 집계
+        total_allocated = int(self.final_allocation_arr.sum())
         total_supply = sum(data['A'].values())
         allocation_rate = total_allocated / total_supply if total_supply > 0 else 0
         
-        allocated_stores = len(set(store for (sku, store), qty in self.final_allocation.items() if qty > 0))
+        allocated_stores = int(np.count_nonzero(self.final_allocation_arr.sum(axis=0)))
         
         print(f"\n✅ 3-Step 최적화 완료!")
         print(f"   Step 1 커버리지: {step1_result['objective']:.1f}")
         print(f"   Step 2 추가 배분: {step2_result['additional_allocation']}개")
         print(f"   Step 3 추가 배분: {step3_result['additional_allocation']}개")
         
-        # 최종 배분 결과 설정
-        self.final_allocation = step3_result['allocation']
-        
-        # 총 배분량 계산
-        total_allocated = sum(self.final_allocation.values())
-        
         # 결과 반환
         return {
             'status': 'success',
             'final_allocation': self.final_allocation,
             'total_allocated': total_allocated,
-            'allocation_rate': total_allocated / sum(data['A'].values()) if sum(data['A'].values()) > 0 else 0,
-            'allocated_stores': len(set(j for i, j in self.final_allocation.keys() if self.final_allocation[(i, j)] > 0)),
+            'allocation_rate': allocation_rate,
+            'allocated_stores': allocated_stores,
             'step1_combinations': step1_result['combinations'],
             'step1_objective': step1_result['objective'],
             'step2_additional': step2_result['additional_allocation'],
@@ -2,95 +2,175 @@
 시각화 모듈
 """
 
+import functools
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
+from matplotlib.colors import Normalize
+
+
+@functools.lru_cache(maxsize=256)
+def get_size_sort_key(size):
+    """사이즈를 정렬 가능한 키로 변환 (사이즈 코드 종류가 적어 결과를 캐싱)"""
+    text_sizes = {'XS': 1, 'S': 2, 'M': 3, 'L': 4, 'XL': 5, 'XXL': 6}
+    if size in text_sizes:
+        return (0, text_sizes[size])
+    try:
+        numeric_size = int(size)
+        return (1, numeric_size)
+    except:
+        return (2, size)
+
+
+def select_top_k(values, k):
+    """값이 큰 순서대로 상위 k개의 인덱스 반환 (동점은 원래 순서 유지)
+    
+    전체 정렬 대신 np.partition으로 k번째 값을 먼저 찾고, 그 이상인 후보만 정렬
+    """
+    values = np.asarray(values)
+    k = max(0, min(k, len(values)))
+    if k == 0:
+        return np.array([], dtype=np.intp)
+    if k < len(values):
+        kth_value = np.partition(values, len(values) - k)[len(values) - k]
+        candidates = np.flatnonzero(values >= kth_value)
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(-values[candidates], kind='stable')][:k]
+
+
+def calculate_max_allocatable_by_tier(sku, target_stores, tier_system, A, default_tier_capacity, tier_info_cache):
+    """SKU의 tier 기반 최대 배분 가능량 (공급량과 지정 매장 tier 용량 합계 중 작은 값)
+    
+    Args:
+        default_tier_capacity: target_stores 전체의 tier 용량 합계 (SKU별 지정 매장이 없을 때 사용)
+        tier_info_cache: SKU별 지정 매장의 tier 정보 캐시 ((매장 튜플, store) -> tier_info)
+    """
+    sku_target_stores = tier_system.get_sku_target_stores(sku, target_stores)
+    if sku_target_stores is target_stores:
+        tier_based_capacity = default_tier_capacity
+    else:
+        tier_based_capacity = 0
+        # 리스트 객체 id 대신 매장 구성 자체를 키로 사용 (새 리스트가 반환되어도 안전)
+        stores_key = tuple(sku_target_stores)
+        for store in sku_target_stores:
+            cache_key = (stores_key, store)
+            if cache_key not in tier_info_cache:
+                tier_info_cache[cache_key] = tier_system.get_store_tier_info(store, sku_target_stores)
+            tier_based_capacity += tier_info_cache[cache_key]['max_sku_limit']
+    actual_supply = A.get(sku, 0)
+    return min(actual_supply, tier_based_capacity)
 
 
 class ResultVisualizer:
     """배분 매트릭스 히트맵 시각화를 담당하는 클래스"""
     
-    def __init__(self):
+    def __init__(self, headless=False, dpi=150):
+        """
+        Args:
+            headless: True면 plt.show() 없이 저장만 수행 (PNG 저장 전용 배치 실행용, 백엔드는 main.py 또는 MPLBACKEND로 지정)
+            dpi: PNG 저장 해상도 (고품질 출력이 필요하면 300; SVG 저장 시에는 무시)
+        """
+        self.headless = headless
+        self.dpi = dpi
         # 한글 폰트 설정
         plt.rcParams['font.family'] = 'DejaVu Sans'
         plt.rcParams['axes.unicode_minus'] = False
+        # 히트맵 컬러맵은 한 번만 조회해서 재사용
+        self._heatmap_cmap = plt.get_cmap('Blues')
+    
+    def _save_figure(self, fig, save_path, **kwargs):
+        """설정된 DPI로 Figure 저장 (벡터 포맷인 SVG는 DPI 지정 생략)"""
+        if not str(save_path).lower().endswith('.svg'):
+            kwargs['dpi'] = self.dpi
+        fig.savefig(save_path, **kwargs)
 
     def create_allocation_matrix_heatmap(self, final_allocation, target_stores, SKUs, QSUM,
-                                       df_sku_filtered, A, tier_system, save_path=None, max_stores=30, max_skus=20, fixed_max=None):
+                                       df_sku_filtered, A, tier_system, save_path=None, max_stores=30, max_skus=20, fixed_max=None,
+                                       return_array=False):
         """
         배분 결과를 매장 × SKU 매트릭스 히트맵으로 시각화
+        
+        return_array=True면 렌더링된 RGBA 배열을 결과의 'image' 키로 함께 반환 (파이프라인 내부용)
         """
         print("📊 배분 매트릭스 히트맵 생성 중...")
         
-        # 0. Tier 기반 배분 가능량 계산 메서드 정의
-        def calculate_max_allocatable_by_tier(sku, target_stores, tier_system, A, QSUM):
-            sku_target_stores = tier_system.get_sku_target_stores(sku, target_stores)
-            tier_based_capacity = 0
-            for store in sku_target_stores:
-                tier_info = tier_system.get_store_tier_info(store, sku_target_stores)
-                tier_based_capacity += tier_info['max_sku_limit']
-            actual_supply = A.get(sku, 0)
-            return min(actual_supply, tier_based_capacity)
-        
-        # 1. 배분이 있는 매장들만 필터링하고 QTY_SUM 기준으로 정렬
-        allocated_stores = []
-        for store in target_stores:
-            store_total = sum(final_allocation.get((sku, store), 0) for sku in SKUs)
-            if store_total > 0:
-                allocated_stores.append((store, store_total, QSUM[store]))
-        
-        allocated_stores.sort(key=lambda x: x[2], reverse=True)
-        selected_stores = [store[0] for store in allocated_stores[:max_stores]]
+        # 배분 결과가 비어 있으면 Figure를 만들지 않고 바로 반환
+        if not any(final_allocation.values()):
+            print("   ⚠️ 배분 결과가 없어 히트맵 생성을 건너뜁니다")
+            empty_result = {
+                'selected_stores': [],
+                'selected_skus': [],
+                'matrix_data': np.zeros((0, 0), dtype=np.int32),
+                'total_allocated': 0
+            }
+            if return_array:
+                empty_result['image'] = None
+            return empty_result
+        
+        # 0. Tier 기반 배분 가능량 계산 준비
+        # SKU별 지정 매장이 없으면 모든 SKU가 같은 target_stores를 쓰므로 tier 용량 합계는 한 번만 계산
+        tier_info_cache = {store: tier_system.get_store_tier_info(store, target_stores) for store in target_stores}
+        sku_tier_info_cache = {}  # SKU별 지정 매장용: (tuple(sku_target_stores), store) -> tier_info
+        default_tier_capacity = sum(tier_info_cache[store]['max_sku_limit'] for store in target_stores)
+        
+        # 1. 배분 결과를 매장 × SKU 행렬로 한 번에 변환 (딕셔너리는 한 번만 순회)
+        store_idx = {store: i for i, store in enumerate(target_stores)}
+        sku_idx = {sku: i for i, sku in enumerate(SKUs)}
+        full_mat = np.zeros((len(target_stores), len(SKUs)), dtype=np.int32)
+        for (sku, store), qty in final_allocation.items():
+            if store in store_idx and sku in sku_idx:
+                full_mat[store_idx[store], sku_idx[sku]] = qty
+        store_totals = full_mat.sum(axis=1)
+        sku_totals = full_mat.sum(axis=0)
+        
+        # 배분이 있는 매장들만 필터링하고 QTY_SUM 기준으로 정렬
+        allocated_rows = np.flatnonzero(store_totals > 0)
+        qsum_arr = np.array([QSUM[target_stores[r]] for r in allocated_rows])
+        top_store_rows = allocated_rows[select_top_k(qsum_arr, max_stores)]
+        selected_stores = [target_stores[r] for r in top_store_rows]
         
         # 2. 배분이 있는 SKU들만 필터링하고 컬러-사이즈 기준으로 정렬
+        # SKU별 컬러/사이즈 정보는 한 번만 딕셔너리로 만들어 재사용 (SKU마다 DataFrame 스캔 방지, 중복 SKU는 첫 행 사용)
+        sku_info_map = (df_sku_filtered.drop_duplicates('SKU')
+                        .set_index('SKU')[['COLOR_CD', 'SIZE_CD']].to_dict('index'))
+        sku_color_size = {sku: (info['COLOR_CD'], info['SIZE_CD']) for sku, info in sku_info_map.items()}
+        
+        # 데이터프레임에 없는 SKU는 SKU 코드(스타일_컬러_사이즈)를 한 번에 분리해서 채움
+        missing_skus = [sku for sku in SKUs if sku not in sku_color_size]
+        if missing_skus:
+            splits = pd.Series(missing_skus).str.split('_', expand=True)
+            for i, sku in enumerate(missing_skus):
+                if splits.shape[1] >= 3 and pd.notna(splits.iat[i, 2]):
+                    sku_color_size[sku] = (splits.iat[i, 1], splits.iat[i, 2])
+                else:
+                    sku_color_size[sku] = ('Unknown', 'Unknown')
+        
+        selected_sku_totals = full_mat[top_store_rows].sum(axis=0)
         allocated_skus = []
-        for sku in SKUs:
-            sku_total = sum(final_allocation.get((sku, store), 0) for store in selected_stores)
+        for col, sku in enumerate(SKUs):
+            sku_total = int(selected_sku_totals[col])
             if sku_total > 0:
-                try:
-                    sku_info = df_sku_filtered[df_sku_filtered['SKU'] == sku].iloc[0]
-                    color = sku_info['COLOR_CD']
-                    size = sku_info['SIZE_CD']
-                except:
-                    parts = sku.split('_')
-                    color = parts[1] if len(parts) >= 3 else 'Unknown'
-                    size = parts[2] if len(parts) >= 3 else 'Unknown'
+                color, size = sku_color_size[sku]
                 allocated_skus.append((sku, sku_total, color, size))
         
-        def get_size_sort_key(size):
-            text_sizes = {'XS': 1, 'S': 2, 'M': 3, 'L': 4, 'XL': 5, 'XXL': 6}
-            if size in text_sizes:
-                return (0, text_sizes[size])
-            try:
-                numeric_size = int(size)
-                return (1, numeric_size)
-            except:
-                return (2, size)
-        
         allocated_skus.sort(key=lambda x: (x[2], get_size_sort_key(x[3])))
         selected_skus = [sku[0] for sku in allocated_skus[:max_skus]]
         
-        # 3. 매트릭스 데이터 생성
-        matrix_data = []
-        store_labels = []
-        for store in selected_stores:
-            row = [final_allocation.get((sku, store), 0) for sku in selected_skus]
-            matrix_data.append(row)
-            store_labels.append(f"{store}\n({QSUM[store]:,})")
+        # 3. 매트릭스 데이터 생성 (전체 행렬에서 선택된 매장/SKU만 잘라냄)
+        top_sku_cols = [sku_idx[sku] for sku in selected_skus]
+        matrix_data = full_mat[np.ix_(top_store_rows, top_sku_cols)]
+        store_labels = [f"{store}\n({QSUM[store]:,})" for store in selected_stores]
         
         # 4. SKU 라벨 생성
         sku_labels = []
         for sku in selected_skus:
-            try:
-                sku_info = df_sku_filtered[df_sku_filtered['SKU'] == sku].iloc[0]
-                color = sku_info['COLOR_CD']
-                size = sku_info['SIZE_CD']
-            except:
-                parts = sku.split('_')
-                color = parts[1] if len(parts) >= 3 else 'Unknown'
-                size = parts[2] if len(parts) >= 3 else 'Unknown'
-            total_allocated = sum(final_allocation.get((sku, store), 0) for store in target_stores)
-            max_allocatable_qty = calculate_max_allocatable_by_tier(sku, target_stores, tier_system, A, QSUM)
-            sku_labels.append(f"{color}-{size}\n({total_allocated}/{max_allocatable_qty})")
+            color, size = sku_color_size[sku]
+            total_allocated = int(sku_totals[sku_idx[sku]])
+            max_allocatable_qty = calculate_max_allocatable_by_tier(
+                sku, target_stores, tier_system, A, default_tier_capacity, sku_tier_info_cache
+            )
+            sku_labels.append(f"{color}-{size} ({total_allocated}/{max_allocatable_qty})")
         
         # 5. 부가 통계 계산 (빈 셀, 컬러/사이즈 커버리지)
 
@@ -103,19 +183,18 @@ class ResultVisualizer:
 
         for row_idx, store in enumerate(selected_stores):
             row_qties = matrix_data[row_idx]
-            # row_qties is a list here – use count(0) instead of numpy comparison
-            empty_cells_counts.append(row_qties.count(0))
+            empty_cells_counts.append(int(np.count_nonzero(row_qties == 0)))
 
             # 색상/사이즈 커버리지
             allocated_skus_row = [selected_skus[col_idx] for col_idx, qty in enumerate(row_qties) if qty > 0]
             colors = set()
             sizes = set()
             for sku in allocated_skus_row:
-                try:
-                    sku_info = df_sku_filtered[df_sku_filtered['SKU'] == sku].iloc[0]
-                    colors.add(sku_info['COLOR_CD'])
-                    sizes.add(sku_info['SIZE_CD'])
-                except:
+                info = sku_info_map.get(sku)
+                if info:
+                    colors.add(info['COLOR_CD'])
+                    sizes.add(info['SIZE_CD'])
+                else:
                     parts = sku.split('_')
                     if len(parts) >= 3:
                         colors.add(parts[1])
@@ -129,24 +208,30 @@ class ResultVisualizer:
         avg_size_cov = np.mean(size_cov_ratios) if size_cov_ratios else 0
 
         # 6. 히트맵 생성
-        matrix_data = np.array(matrix_data)
         vmax_val = fixed_max if fixed_max is not None else max(1, matrix_data.max())
         fig, ax = plt.subplots(figsize=(max(12, len(selected_skus)*0.8), max(8, len(selected_stores)*0.4)))
-        im = ax.imshow(matrix_data, cmap='Blues', aspect='auto', vmin=0, vmax=vmax_val)
+        # 이미지 레이어는 래스터로 출력 (벡터 포맷 저장 시 셀별 path 생성 방지, 텍스트는 벡터 유지)
+        im = ax.imshow(matrix_data, cmap=self._heatmap_cmap, norm=Normalize(vmin=0, vmax=vmax_val),
+                       aspect='auto', rasterized=True)
         cbar = plt.colorbar(im, ax=ax, shrink=0.8)
         cbar.set_label('Allocated Quantity', rotation=270, labelpad=15)
         
-        ax.set_xticks(range(len(selected_skus)))
-        ax.set_yticks(range(len(selected_stores)))
-        ax.set_xticklabels(sku_labels, rotation=45, ha='right', fontsize=9)
-        ax.set_yticklabels(store_labels, ha='right', fontsize=9)
+        # 눈금/라벨은 한 번에 설정하고 글자 크기는 tick_params로 일괄 지정
+        ax.set_xticks(range(len(selected_skus)), labels=sku_labels, rotation=45, ha='right')
+        ax.set_yticks(range(len(selected_stores)), labels=store_labels, ha='right')
+        ax.tick_params(axis='both', which='major', labelsize=9)
         
-        for i in range(len(selected_stores)):
-            for j in range(len(selected_skus)):
-                qty = matrix_data[i, j]
-                if qty > 0:
-                    text_color = 'white' if qty > matrix_data.max()*0.6 else 'black'
-                    ax.text(j, i, str(int(qty)), ha='center', va='center', color=text_color, fontweight='bold', fontsize=8)
+        # 배분량이 있는 셀만 순회하며 텍스트 추가 (0인 셀은 건너뜀)
+        # 텍스트 색상 기준(최댓값의 60%)은 루프 밖에서 한 번에 마스크로 계산
+        white_mask = matrix_data > matrix_data.max()*0.6
+        # 셀 값은 대부분 작은 정수가 반복되므로 값별 라벨 문자열은 한 번만 생성
+        rows, cols = np.nonzero(matrix_data)
+        values = matrix_data[rows, cols]
+        value_labels = {v: str(int(v)) for v in np.unique(values)}
+        text_kwargs = dict(ha='center', va='center', fontweight='bold', fontsize=8)
+        for i, j, qty in zip(rows, cols, values):
+            text_color = 'white' if white_mask[i, j] else 'black'
+            ax.text(j, i, value_labels[qty], color=text_color, **text_kwargs)
         
         # ----- Right-side axis showing empty cell count per store -----
         ax_right = ax.twinx()
@@ -186,20 +271,33 @@ class ResultVisualizer:
         plt.tight_layout()
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            # figsize가 정해져 있고 tight_layout을 이미 적용했으므로 bbox_inches='tight'의 추가 그리기 생략
+            self._save_figure(fig, save_path)
             print(f"   📊 배분 매트릭스 저장: {save_path}")
-            plt.close()
-        else:
+        elif not self.headless:
             plt.show()
         
+        image = None
+        if return_array:
+            # 파일을 거치지 않고 캔버스 버퍼를 바로 배열로 변환
+            fig.canvas.draw()
+            image = np.asarray(fig.canvas.buffer_rgba()).copy()
+        
+        # 화면에 띄우지 않은 Figure(저장/배열 반환/headless)는 더 쓸 일이 없으므로 닫음 (반복 호출 시 Figure 누적 방지)
+        if save_path or return_array or self.headless:
+            plt.close(fig)
+        
         print(f"   📋 매트릭스 요약:")
         print(f"      표시된 매장: {len(selected_stores)}개")
         print(f"      표시된 SKU: {len(selected_skus)}개")
         print(f"      총 배분량: {total_allocated:,}개")
         
-        return {
+        result = {
             'selected_stores': selected_stores,
             'selected_skus': selected_skus,
             'matrix_data': matrix_data,
             'total_allocated': total_allocated
         }
+        if return_array:
+            result['image'] = image
+        return result